@@ -1,7 +1,24 @@
 #!/usr/bin/env python3
+import asyncio
+import atexit
+import functools
+import hashlib
+import http.client
+import json
 import os
+import pickle
+import posixpath
+import queue
+import re
+import secrets
 import shlex
+import shutil
 import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
 
 # --- Config loading (TOML) ---
@@ -10,19 +27,63 @@ try:
 except ModuleNotFoundError:  # Python 3.10 and older
     import tomli as tomllib  # pip install tomli
 
+try:
+    import asyncssh  # only needed for ssh_backend = "asyncssh"
+except ModuleNotFoundError:
+    asyncssh = None
+
+try:
+    from rich.progress import Progress  # optional: nicer rsync progress bar
+except ModuleNotFoundError:
+    Progress = None
+
 
 DEFAULTS = {
     "nas_host": "indonas_lan",          # ssh config host or user@host
     "remote_root": "/mnt/media1/Games",
     "local_dest": str(Path.home() / "Downloads"),
     "use_rsync": True,
+    "listing_cache_ttl": 3600,          # seconds a cached dir listing stays fresh (0 = no cache)
+    "rsync_flags": None,                # list of rsync flags; unset = tuned for rsync >= 3.2 if available
+    "parallel_streams": 4,              # ssh streams for one large file (1 = off)
+    "ssh_backend": "openssh",           # "openssh" or "asyncssh" (in-process listings + sftp downloads)
+    "dir_transport": None,              # "rsync", "sftp" or "sshtar"; unset = rsync if use_rsync else sshtar
+    "sshtar_zstd": False,               # compress the sshtar stream (slow links, spare CPU)
 }
 
 CONFIG_PATH = Path(os.environ.get("NAS_FETCH_CONFIG", "~/.config/nas_fetch/config.toml")).expanduser()
 
+# Shared ssh socket so every ssh/rsync/scp reuses one authenticated connection
+# (in a private dir, and %C-hashed, so no other local user can plant a socket there)
+CONTROL_DIR = Path(os.environ.get("XDG_RUNTIME_DIR") or Path.home() / ".ssh")
+CONTROL_PATH = str(CONTROL_DIR / "nas_fetch-%C")
+SSH_OPTS = ["-o", f"ControlPath={CONTROL_PATH}"]
+
+# In-process asyncssh connection when ssh_backend = "asyncssh", else None
+_session = None
+
+# Directory listings, keyed by (nas_host, remote_dir) -> (fetched_at, {name: size})
+LISTING_CACHE_PATH = Path("~/.cache/nas_fetch/listing.pkl").expanduser()
+LISTING_CACHE_SIZE = 256
+_listing_cache: OrderedDict = OrderedDict()
+_listing_lock = threading.Lock()
+
+# Background listing of the subdirs currently on screen, so entering one is instant
+PREFETCH_WORKERS = 4
+PREFETCH_LIMIT = 64                     # max subdirs queued per listing
+PREFETCH_BATCH = 8                      # subdirs listed per ssh call
+
+# Files at least this big are fetched as parallel byte-range stripes
+PARALLEL_MIN_SIZE = 256 * 1024 * 1024
+# Per-stripe progress of interrupted parallel downloads, so a rerun resumes them
+INFLIGHT_DIR = Path("~/.cache/nas_fetch/inflight").expanduser()
+_prefetch_pool = None
+_prefetch_futures: set = set()
+
 
 def load_config() -> dict:
     cfg = dict(DEFAULTS)
+    data = {}
     if CONFIG_PATH.exists():
         with CONFIG_PATH.open("rb") as f:
             data = tomllib.load(f)
@@ -31,46 +92,363 @@ def load_config() -> dict:
         cfg.update({k: v for k, v in data.items() if v is not None})
 
     # Normalize / validate
-    cfg["local_dest"] = str(Path(str(cfg["local_dest"])).expanduser())
-    cfg["remote_root"] = str(cfg["remote_root"])
+    cfg["local_dest"] = Path(cfg["local_dest"]).expanduser()
+    cfg["remote_root"] = posixpath.normpath(str(cfg["remote_root"]))
     cfg["nas_host"] = str(cfg["nas_host"])
     cfg["use_rsync"] = bool(cfg["use_rsync"])
+    cfg["listing_cache_ttl"] = float(cfg["listing_cache_ttl"])
+    if cfg["rsync_flags"] is not None:
+        if not isinstance(cfg["rsync_flags"], list):
+            raise RuntimeError(f"rsync_flags must be a list of strings: {CONFIG_PATH}")
+        cfg["rsync_flags"] = [str(x) for x in cfg["rsync_flags"]]
+    cfg["parallel_streams"] = max(1, int(cfg["parallel_streams"]))
+    cfg["ssh_backend"] = str(cfg["ssh_backend"])
+    if cfg["ssh_backend"] not in ("openssh", "asyncssh"):
+        raise RuntimeError(f"ssh_backend must be \"openssh\" or \"asyncssh\": {CONFIG_PATH}")
+    if cfg["dir_transport"] is None:
+        cfg["dir_transport"] = "rsync" if cfg["use_rsync"] else "sshtar"
+    cfg["dir_transport"] = str(cfg["dir_transport"])
+    if cfg["dir_transport"] not in ("rsync", "sftp", "sshtar"):
+        raise RuntimeError(f"dir_transport must be \"rsync\", \"sftp\" or \"sshtar\": {CONFIG_PATH}")
+    cfg["sshtar_zstd"] = bool(cfg["sshtar_zstd"])
+    if cfg["ssh_backend"] == "asyncssh":
+        if asyncssh is None:
+            raise RuntimeError("ssh_backend = \"asyncssh\" needs the asyncssh package (pip install asyncssh)")
+        # asyncssh downloads everything over its own sftp; these would be silently ignored
+        ignored = [k for k in ("dir_transport", "sshtar_zstd", "rsync_flags") if data.get(k) is not None]
+        if ignored:
+            raise RuntimeError(f"Not supported with ssh_backend = \"asyncssh\": {', '.join(ignored)}: {CONFIG_PATH}")
     return cfg
 
 
-def run(cmd: str) -> str:
+def run(argv: list[str]) -> str:
     p = subprocess.run(
-        cmd,
-        shell=True,
+        argv,
         text=True,
+        stdin=subprocess.DEVNULL,  # keep background ssh calls off the terminal fzf is reading
         stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+        stderr=subprocess.PIPE,
+        check=False
     )
     if p.returncode != 0:
-        raise RuntimeError(f"Command failed:\n{cmd}\n\nstderr:\n{p.stderr}")
+        raise RuntimeError(f"Command failed:\n{shlex.join(argv)}\n\nstderr:\n{p.stderr}")
     return p.stdout
 
 
-def list_remote(nas_host: str, remote_dir: str) -> list[str]:
-    cmd = f"ssh {shlex.quote(nas_host)} {shlex.quote(f'cd {remote_dir} && ls -1p')}"
-    out = run(cmd)
-    return [x for x in out.splitlines() if x.strip()]
+class AsyncSSHSession:
+    """
+    One asyncssh connection, driven by an event loop on a background thread
+    so the sync code (and the prefetch threads) can share it.
+    """
+
+    def __init__(self, nas_host: str):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        # asyncssh takes the user separately; ssh's "user@host" form isn't parsed
+        user, _, host = nas_host.rpartition("@")
+        kwargs = {"username": user} if user else {}
+        self.conn = self._call(asyncssh.connect(host, **kwargs))
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def run(self, cmd: str) -> str:
+        p = self._call(self.conn.run(cmd, check=False))
+        if p.exit_status != 0:
+            raise RuntimeError(f"Command failed:\n{cmd}\n\nstderr:\n{p.stderr}")
+        return p.stdout
+
+    def get(self, remote_path: str, local_dest: Path, is_dir: bool):
+        async def _get():
+            async with self.conn.start_sftp_client() as sftp:
+                await sftp.get(remote_path, str(local_dest), recurse=is_dir, preserve=True,
+                               max_requests=64, block_size=262144)
+        self._call(_get())
+
+    def close(self):
+        self.conn.close()
+        self._call(self.conn.wait_closed())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def remote_run(nas_host: str, cmd: str) -> str:
+    """
+    Runs a shell command on the NAS and returns its stdout.
+    """
+    if _session is not None:
+        return _session.run(cmd)
+    # ssh joins its args into one remote shell command, so only the last one is shell code
+    return run(["ssh", *SSH_OPTS, nas_host, cmd])
+
+
+def setup_control_master(nas_host: str):
+    """
+    Opens a persistent ssh ControlMaster for nas_host (torn down at exit).
+    If it can't be opened, later commands just fall back to their own connections.
+    """
+    try:
+        CONTROL_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    except OSError:
+        return
+    check = subprocess.run(
+        ["ssh", *SSH_OPTS, "-O", "check", nas_host],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    if check.returncode == 0:
+        return  # someone else's master is already up; reuse it, don't tear it down
+
+    p = subprocess.run(
+        ["ssh", *SSH_OPTS, "-o", "ControlMaster=yes", "-o", "ControlPersist=600", "-fN", nas_host],
+        stderr=subprocess.DEVNULL
+    )
+    if p.returncode == 0:
+        atexit.register(teardown_control_master, nas_host)
+
+
+def teardown_control_master(nas_host: str):
+    subprocess.run(
+        ["ssh", *SSH_OPTS, "-O", "exit", nas_host],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+
+# One NUL-terminated record per entry (names may contain newlines):
+# type and size of the symlink target (-L), then the name. Dotfiles are
+# dropped here, like ls does, so the LISTING_LIMIT cap counts visible entries.
+FIND_LISTING = "find -L . -mindepth 1 -maxdepth 1 ! -name '.*' -printf '%y\\t%s\\t%f\\0'"
+LS_LISTING = "ls -1p"
+
+# Dirs with more entries than this are only fetched up to the limit,
+# and then filtered on the NAS as the user types (see pick_with_fzf)
+LISTING_LIMIT = 2000
+REMOTE_FILTER_MATCHES = 500
+
+
+@functools.lru_cache(maxsize=None)
+def remote_find_printf_ok(nas_host: str) -> bool:
+    # GNU find has -printf; BSD/busybox find doesn't
+    try:
+        remote_run(nas_host, "find / -maxdepth 0 -printf ''")
+    except RuntimeError:
+        return False
+    return True
+
+
+def listing_cmd(nas_host: str) -> tuple[str, bool]:
+    """
+    Returns (remote listing command for the cwd, whether it is FIND_LISTING).
+    Either way the output is NUL-separated records.
+    """
+    if remote_find_printf_ok(nas_host):
+        return (f"{FIND_LISTING} | head -z -n {LISTING_LIMIT + 1}", True)
+    # no GNU find, so no head -z either: cap lines, then NUL-terminate them
+    return (f"{LS_LISTING} | head -n {LISTING_LIMIT + 1} | tr '\\n' '\\0'", False)
+
+
+def parse_listing(records: list[str], from_find: bool) -> dict[str, int]:
+    """
+    Parses FIND_LISTING (or LS_LISTING) records into {name: size}, sorted by name.
+    Dirs keep the ls -p style trailing "/"; size is -1 when unknown.
+    """
+    entries = {}
+    for rec in records:
+        if not rec:
+            continue
+        if not from_find:
+            entries[rec] = -1
+            continue
+        try:
+            kind, size, name = rec.split("\t", 2)
+            size = int(size)
+        except ValueError:
+            continue  # not a find record; skip rather than lose the whole listing
+        entries[name + "/" if kind == "d" else name] = size
+    return dict(sorted(entries.items()))
+
+
+def list_remote(nas_host: str, remote_dir: str) -> dict[str, int]:
+    listing, from_find = listing_cmd(nas_host)
+    out = remote_run(nas_host, f"cd {shlex.quote(remote_dir)} && {listing}")
+    return parse_listing(out.split("\0"), from_find)
 
 
-def pick_with_fzf(lines: list[str]) -> tuple[str, str]:
+def list_remote_batch(nas_host: str, dirs: list[str]) -> dict[str, dict[str, int]]:
+    """
+    Lists several remote dirs with a single ssh call.
+    Dirs that can't be listed are left out of the result.
+    """
+    if not dirs:
+        return {}
+    listing, from_find = listing_cmd(nas_host)
+    # Each dir is emitted as the records "\tdir\t<dir>", <listing records...>, "\tok" or "\terr".
+    # Listing records start with the entry type (or an ls name), never with "\t<marker>".
+    script = (
+        f"for d in {' '.join(shlex.quote(d) for d in dirs)}; do "
+        "printf '\\tdir\\t%s\\0' \"$d\"; "
+        f"if (cd -- \"$d\" && {listing}) 2>/dev/null; then printf '\\tok\\0'; else printf '\\terr\\0'; fi; "
+        "done"
+    )
+
+    listings = {}
+    cur, records = None, []
+    for rec in remote_run(nas_host, script).split("\0"):
+        if rec.startswith("\tdir\t"):
+            cur, records = rec[len("\tdir\t"):], []
+        elif rec in ("\tok", "\terr"):
+            if rec == "\tok" and cur is not None:
+                listings[cur] = parse_listing(records, from_find)
+            cur = None
+        elif cur is not None:
+            records.append(rec)
+    return listings
+
+
+def load_listing_cache():
+    try:
+        with LISTING_CACHE_PATH.open("rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        return  # missing, corrupt or foreign cache: start empty
+    if isinstance(data, OrderedDict):
+        with _listing_lock:
+            # skip malformed entries and those cached by older versions as plain name lists
+            _listing_cache.update(
+                (k, v) for k, v in data.items()
+                if isinstance(v, tuple) and len(v) == 2 and isinstance(v[1], dict)
+            )
+
+
+def save_listing_cache():
+    try:
+        LISTING_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with _listing_lock, LISTING_CACHE_PATH.open("wb") as f:
+            pickle.dump(_listing_cache, f)
+    except OSError:
+        pass  # cache is best-effort
+
+
+def get_cached_listing(nas_host: str, remote_dir: str, ttl: float):
+    key = (nas_host, remote_dir)
+    with _listing_lock:
+        hit = _listing_cache.get(key)
+        if hit is None or time.time() - hit[0] >= ttl:
+            return None
+        _listing_cache.move_to_end(key)
+        return hit[1]
+
+
+def store_listing(nas_host: str, remote_dir: str, items: dict[str, int]):
+    key = (nas_host, remote_dir)
+    with _listing_lock:
+        _listing_cache[key] = (time.time(), items)
+        _listing_cache.move_to_end(key)
+        while len(_listing_cache) > LISTING_CACHE_SIZE:
+            _listing_cache.popitem(last=False)
+
+
+def cached_list_remote(nas_host: str, remote_dir: str, ttl: float, refresh: bool = False) -> dict[str, int]:
+    """
+    list_remote() through an LRU cache; refresh=True forces a fresh ssh listing.
+    """
+    if not refresh:
+        items = get_cached_listing(nas_host, remote_dir, ttl)
+        if items is not None:
+            return items
+
+    items = list_remote(nas_host, remote_dir)
+    store_listing(nas_host, remote_dir, items)
+    return items
+
+
+def _prefetch_batch(nas_host: str, dirs: list[str]):
+    try:
+        listings = list_remote_batch(nas_host, dirs)
+    except RuntimeError:
+        return  # the real listing will report the error if one of these is entered
+    for d, items in listings.items():
+        store_listing(nas_host, d, items)
+
+
+def prefetch_subdirs(nas_host: str, remote_dir: str, items: dict[str, int], ttl: float):
+    """
+    Lists the subdirectories of remote_dir in the background and caches them.
+    Any prefetches still queued from the previous directory are cancelled.
+    """
+    global _prefetch_pool
+    if ttl <= 0:
+        return  # caching disabled, prefetched listings would never be used
+    if _prefetch_pool is None:
+        _prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS)
+        atexit.register(stop_prefetch)
+
+    for fut in _prefetch_futures:
+        fut.cancel()
+    _prefetch_futures.clear()
+
+    subdirs = [posixpath.join(remote_dir, x[:-1]) for x in items if x.endswith("/")][:PREFETCH_LIMIT]
+    todo = [d for d in subdirs if get_cached_listing(nas_host, d, ttl) is None]
+    for i in range(0, len(todo), PREFETCH_BATCH):
+        batch = todo[i:i + PREFETCH_BATCH]
+        _prefetch_futures.add(_prefetch_pool.submit(_prefetch_batch, nas_host, batch))
+
+
+def stop_prefetch():
+    """
+    Cancels queued prefetches and retires the pool, e.g. before a download;
+    at most the batches already running still finish.
+    """
+    global _prefetch_pool
+    for fut in _prefetch_futures:
+        fut.cancel()
+    _prefetch_futures.clear()
+    if _prefetch_pool is not None:
+        _prefetch_pool.shutdown(wait=False, cancel_futures=True)
+        _prefetch_pool = None
+
+
+def remote_filter_cmd(nas_host: str, remote_dir: str, query: str = "{q}") -> str:
+    """
+    Local shell command for fzf's reload: lists remote_dir entries matching the
+    current query, filtered on the NAS. The query goes over ssh's stdin so it
+    never has to be re-quoted for the remote shell.
+    query is the local shell word holding the query (fzf's {q} by default).
+    """
+    remote = (
+        f"IFS= read -r q; cd {shlex.quote(remote_dir)} && "
+        f"ls -1p | grep -iF -- \"$q\" | head -n {REMOTE_FILTER_MATCHES}"
+    )
+    ssh = shlex.join(["ssh", *SSH_OPTS, nas_host, remote])
+    return f"printf '../\\n'; printf '%s\\n' {query} | {ssh}"
+
+
+def pick_with_fzf(lines: list[str], reload_cmd: str = None) -> tuple[str, str]:
     """
     Returns (key, selection).
-      key is "" for Enter, or "d"/"D" for download, or "" with empty selection for Esc.
+      key is "" for Enter, "d"/"D" for download, "ctrl-r" for refresh,
+      or "" with empty selection for Esc.
+    With reload_cmd, lines are ignored and fzf lists/filters through that command instead.
     """
+    argv = [
+        "fzf",
+        "--height=90%",
+        "--reverse",
+        "--prompt=NAS> ",
+        "--header=Enter: open dir / download file | D: download dir | Ctrl-R: refresh | Esc: quit",
+        "--expect=d,D,ctrl-r",
+    ]
+    if reload_cmd:
+        argv += [
+            "--disabled",
+            f"--bind=start:reload:{reload_cmd}",
+            f"--bind=change:reload:{reload_cmd}",
+        ]
+        lines = []
     p = subprocess.run(
-        [
-            "fzf",
-            "--height=90%",
-            "--reverse",
-            "--prompt=NAS> ",
-            "--header=Enter: open dir / download file | D: download dir | Esc: quit",
-            "--expect=d,D",
-        ],
+        argv,
         input="".join(lines),
         text=True,
         stdout=subprocess.PIPE
@@ -80,69 +458,513 @@ def pick_with_fzf(lines: list[str]) -> tuple[str, str]:
     if not out:
         return ("", "")
     if len(out) == 1:
+        if out[0].strip() == "ctrl-r":
+            return ("ctrl-r", "")  # refresh with nothing matching the query
         # Enter accept without key line (rare), or edge case
         return ("", out[0].strip())
 
-    key = out[0].strip()          # "d" / "D" / ""
+    key = out[0].strip()          # "d" / "D" / "ctrl-r" / ""
     sel = out[1].strip()
     return (key, sel)
 
 
-def download_rsync(nas_host: str, remote_path: str, local_dest: str):
-    os.makedirs(local_dest, exist_ok=True)
-    cmd = ["rsync", "-avP", "--protect-args", f"{nas_host}:{remote_path}", local_dest + "/"]
-    subprocess.check_call(cmd)
+@functools.lru_cache(maxsize=None)
+def fzf_listen_ok() -> bool:
+    # --listen with FZF_API_KEY enforced (and FZF_PORT, enable/disable-search): fzf >= 0.43
+    try:
+        out = run(["fzf", "--version"])
+    except (RuntimeError, OSError):
+        return False
+    try:
+        version = tuple(int(x) for x in out.split()[0].split(".")[:2])
+    except (ValueError, IndexError):
+        return False
+    return version >= (0, 43)
 
 
-def download_scp(nas_host: str, remote_path: str, local_dest: str, is_dir: bool):
-    os.makedirs(local_dest, exist_ok=True)
-    cmd = ["scp"]
-    if is_dir:
-        cmd += ["-r"]
-    cmd += ["-p", f"{nas_host}:{remote_path}", local_dest + "/"]
-    subprocess.check_call(cmd)
+class FzfSession:
+    """
+    One fzf kept open for the whole browse, instead of a fresh fzf per directory.
+    Listings are pushed in through fzf's --listen HTTP API (on a port fzf picks,
+    guarded by a random API key); key presses come back through a fifo as
+    "<key>\\t<selection>" lines.
+    """
 
+    KEYS = ("enter", "d", "D", "ctrl-r")
+
+    def __init__(self):
+        self.tmp = tempfile.mkdtemp(prefix="nas_fetch-")
+        self.fifo = os.path.join(self.tmp, "events")
+        self.listing = os.path.join(self.tmp, "listing")
+        self.filter = os.path.join(self.tmp, "filter.sh")
+        os.mkfifo(self.fifo)
+
+        # Without the key, any local user could POST execute(...) actions to fzf
+        self.api_key = secrets.token_urlsafe(32)
+        self.port = None
+        self.port_ready = threading.Event()
+        self.generation = 0     # bumped per show(); events from before it are stale
+        self.synced = False
+
+        fifo = shlex.quote(self.fifo)
+        binds = [f"--bind={k}:execute-silent(printf '%s\\t%s\\n' {k} {{}} >> {fifo})" for k in self.KEYS]
+        self.proc = subprocess.Popen(
+            [
+                "fzf",
+                "--height=90%",
+                "--reverse",
+                "--prompt=NAS> ",
+                "--header=Enter: open dir / download file | D: download dir | Ctrl-R: refresh | Esc: quit",
+                "--listen",
+                *binds,
+                # only live while a huge dir is filtered on the NAS
+                f"--bind=change:reload:sh {shlex.quote(self.filter)} {{q}}",
+                # report the port fzf picked, rather than us picking one that may get taken
+                f"--bind=start:unbind(change)+execute-silent(printf 'port\\t%s\\n' \"$FZF_PORT\" >> {fifo})",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            env={**os.environ, "FZF_API_KEY": self.api_key}
+        )
+
+        self.events = queue.Queue()
+        threading.Thread(target=self._read_events, daemon=True).start()
+
+    def _read_events(self):
+        # O_RDWR so the fifo never reports EOF between fzf's writes
+        with open(os.open(self.fifo, os.O_RDWR), "r") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line.startswith("port\t"):
+                    self.port = int(line[len("port\t"):])
+                    self.port_ready.set()
+                else:
+                    self.events.put(line)
+
+    def _post(self, action: str):
+        if not self.port_ready.wait(timeout=5):
+            raise RuntimeError("fzf did not report its --listen port")
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            conn.request("POST", "/", body=action.encode(), headers={"x-api-key": self.api_key})
+            resp = conn.getresponse()
+            body = resp.read()
+        finally:
+            conn.close()
+        if resp.status != 200:
+            raise RuntimeError(f"fzf rejected {action!r}: {resp.status} {body.decode(errors='replace')}")
+
+    def show(self, lines: list[str], filter_cmd: str = None):
+        """
+        Replaces fzf's list with lines, or with filter_cmd's output when the dir
+        is filtered on the NAS (filter_cmd gets the query as "$1").
+        """
+        if filter_cmd:
+            with open(self.filter, "w") as f:
+                f.write(filter_cmd + "\n")
+            action = f"disable-search+rebind(change)+clear-query+first+reload(sh {shlex.quote(self.filter)} '')"
+        else:
+            with open(self.listing, "w") as f:
+                f.write("".join(lines))
+            action = f"unbind(change)+enable-search+clear-query+first+reload(cat {shlex.quote(self.listing)})"
+        # fzf runs actions and key bindings in order, so this marker lands in the
+        # fifo after any key press made against the previous list
+        self.generation += 1
+        self.synced = False
+        fifo = shlex.quote(self.fifo)
+        self._post(f"{action}+execute-silent(printf 'gen\\t%s\\n' {self.generation} >> {fifo})")
+
+    def next_event(self) -> tuple[str, str]:
+        """
+        Waits for a key press; returns (key, selection) like pick_with_fzf().
+        """
+        while True:
+            try:
+                line = self.events.get(timeout=0.1)
+            except queue.Empty:
+                if self.proc.poll() is not None:
+                    return ("", "")  # Esc / fzf gone
+                continue
+            key, _, sel = line.partition("\t")
+            if key == "gen":
+                self.synced = sel == str(self.generation)
+                continue
+            if not self.synced:
+                continue  # e.g. a fast double Enter, meant for the previous dir
+            sel = sel.strip()
+            if key == "ctrl-r":
+                return ("ctrl-r", sel)
+            if sel:
+                return ("" if key == "enter" else key, sel)
+
+    def close(self):
+        if self.proc.poll() is None:
+            try:
+                if not self.port_ready.is_set():
+                    raise RuntimeError("fzf port unknown")  # don't wait on it again; just terminate
+                self._post("abort")
+                self.proc.wait(timeout=2)
+            except (OSError, RuntimeError, subprocess.TimeoutExpired):
+                self.proc.terminate()
+                self.proc.wait()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+# Anchored to the start of a line so openrsync's "rsync version 2.6.9 compatible"
+# trailer (and its "protocol version 29" header) don't pass for samba rsync
+RSYNC_VERSION_RE = re.compile(r"^rsync\s+version\s+v?(\d+)\.(\d+)", re.MULTILINE)
+
+
+def parse_rsync_version(out: str) -> tuple[int, ...]:
+    # "rsync  version 3.2.7  protocol version 31"; (0,) for openrsync or anything unknown
+    if out.startswith("openrsync"):
+        return (0,)
+    m = RSYNC_VERSION_RE.search(out)
+    return (int(m.group(1)), int(m.group(2))) if m else (0,)
+
+
+@functools.lru_cache(maxsize=None)
+def rsync_versions(nas_host: str) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """
+    Returns (local, remote) rsync versions; (0,) for one that couldn't be probed.
+    """
+    versions = []
+    for argv in (["rsync", "--version"], None):
+        try:
+            out = run(argv) if argv else remote_run(nas_host, "rsync --version")
+        except (RuntimeError, OSError):
+            out = ""
+        versions.append(parse_rsync_version(out))
+    return tuple(versions)
+
+
+def tuned_rsync_flags(nas_host: str, resume: bool) -> tuple[str, ...]:
+    """
+    LAN-friendly rsync flags, plus cheap zstd compression when both ends are rsync >= 3.2.
+    resume (a partial single file, see can_append_resume): append to it and verify it afterwards.
+    Otherwise: no delta algorithm; --append would skip any local file that is
+    the same size or larger even if the remote one changed, and rsync refuses
+    --append together with --whole-file anyway.
+    """
+    flags = ("-aP", "--append-verify") if resume else ("-aP", "--whole-file")
+    if min(rsync_versions(nas_host)) >= (3, 2):
+        flags += ("--compress-choice=zstd", "--compress-level=1")
+    return flags
 
-def download(nas_host: str, use_rsync: bool, remote_path: str, local_dest: str, is_dir: bool):
-    if use_rsync:
-        download_rsync(nas_host, remote_path, local_dest)
+
+# rsync --info=progress2 line: "  1,234,567  42%   98.76MB/s    0:00:12 (xfr#1, to-chk=0/1)"
+RSYNC_PROGRESS_RE = re.compile(r"^\s*([\d,]+)\s+(\d+)%\s+(\S+/s)")
+
+
+def download_rsync(nas_host: str, remote_path: str, local_dest: Path, flags: list[str],
+                   progress: bool = False):
+    """
+    progress=True (needs local rsync >= 3.1) parses rsync's overall progress
+    into a progress bar; otherwise rsync writes to the terminal itself.
+    """
+    cmd = ["rsync", *flags, "--protect-args", "-e", shlex.join(["ssh", *SSH_OPTS]),
+           f"{nas_host}:{remote_path}", f"{local_dest}/"]
+    if not progress:
+        subprocess.check_call(cmd)
+        return
+
+    cmd[1:1] = ["--info=progress2", "--outbuf=L"]
+    # text mode turns rsync's \r progress updates into separate lines;
+    # filenames needn't be UTF-8
+    p = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, errors="replace")
+    if Progress is not None:
+        with Progress() as bar:
+            task = bar.add_task("rsync", total=100)
+            for line in p.stdout:
+                m = RSYNC_PROGRESS_RE.match(line)
+                if m:
+                    done = human_size(int(m.group(1).replace(",", "")))
+                    bar.update(task, completed=int(m.group(2)), description=f"{done} @ {m.group(3)}")
+                elif line.strip():
+                    bar.console.print(line.rstrip())
     else:
-        download_scp(nas_host, remote_path, local_dest, is_dir=is_dir)
+        mid_line = False  # a progress update is on screen without its newline
+        for line in p.stdout:
+            if RSYNC_PROGRESS_RE.match(line):
+                print(f"\r{line.rstrip()}", end="", flush=True)
+                mid_line = True
+            elif line.strip():
+                print(("\n" if mid_line else "") + line.rstrip())
+                mid_line = False
+        if mid_line:
+            print()
+    if p.wait() != 0:
+        raise subprocess.CalledProcessError(p.returncode, cmd)
+
+
+def sftp_quote(path: str) -> str:
+    return '"' + path.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def download_sftp(nas_host: str, remote_path: str, local_dest: Path, is_dir: bool):
+    # 256 KiB reads with 64 in flight, instead of scp's small fixed window.
+    # -b implies BatchMode (no password prompts) and hides the progress meter:
+    # turn the former back off and toggle the latter back on.
+    cmd = ["sftp", *SSH_OPTS, "-o", "BatchMode=no", "-B", "262144", "-R", "64", "-b", "-", nas_host]
+    get = "get -p" + (" -r" if is_dir else "")
+    batch = f"progress\n{get} {sftp_quote(remote_path)} {sftp_quote(f'{local_dest}/')}\n"
+    subprocess.run(cmd, input=batch, text=True, check=True)
+
+
+def download_sshtar(nas_host: str, remote_path: str, local_dest: Path, zstd: bool = False):
+    """
+    Streams a remote dir as one tar over ssh into a local tar, instead of
+    a transfer round-trip per file.
+    """
+    parent, name = posixpath.split(remote_path.rstrip("/"))
+    remote = f"tar -C {shlex.quote(parent or '/')} -cf - -- {shlex.quote(name)}"
+    if zstd:
+        remote += " | zstd -T0 -1 -q"
+    stages = [["ssh", *SSH_OPTS, nas_host, remote]]
+    if zstd:
+        stages.append(["zstd", "-d", "-q"])
+    stages.append(["tar", "-C", str(local_dest), "-xf", "-"])
+
+    procs = []
+    for i, argv in enumerate(stages):
+        last = i == len(stages) - 1
+        procs.append(subprocess.Popen(
+            argv,
+            stdin=procs[-1].stdout if procs else subprocess.DEVNULL,
+            stdout=None if last else subprocess.PIPE
+        ))
+        if len(procs) > 1:
+            procs[-2].stdout.close()  # so the producer sees SIGPIPE if a consumer dies
+    for argv, p in zip(stages, procs):
+        if p.wait() != 0:
+            raise subprocess.CalledProcessError(p.returncode, argv)
+
+
+def human_size(n: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if n < 1024 or unit == "TiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+@functools.lru_cache(maxsize=None)
+def remote_dd_ranges_ok(nas_host: str) -> bool:
+    # GNU dd can seek/limit by bytes; BSD/busybox dd can't
+    try:
+        remote_run(nas_host, "dd if=/dev/null of=/dev/null iflag=skip_bytes,count_bytes count=0 status=none")
+    except RuntimeError:
+        return False
+    return True
+
+
+def remote_stat(nas_host: str, remote_path: str) -> tuple[int, int]:
+    """
+    Returns the current (size, mtime) of a remote file, following symlinks.
+    """
+    out = remote_run(nas_host, f"stat -L -c '%s %Y' -- {shlex.quote(remote_path)}")
+    size, mtime = out.split()
+    return (int(size), int(mtime))
+
+
+def can_append_resume(nas_host: str, remote_path: str, local_dest: Path) -> bool:
+    """
+    True if the local copy of remote_path looks like an interrupted download:
+    shorter than the remote file and written after it last changed (rsync -a
+    only sets the remote mtime on a completed file). A complete copy of an
+    older version fails this, so it gets re-sent rather than appended to.
+    """
+    local = local_dest / posixpath.basename(remote_path)
+    try:
+        st = local.stat()
+        size, mtime = remote_stat(nas_host, remote_path)
+    except (OSError, RuntimeError, ValueError):
+        return False
+    return st.st_size < size and int(st.st_mtime) >= mtime
+
+
+def _fetch_stripe(nas_host: str, remote_path: str, fd: int, offset: int, length: int,
+                  done: list[int], i: int):
+    pos = offset + done[i]  # resume after whatever an earlier run already wrote
+    if pos == offset + length:
+        return
+    argv = ["ssh", *SSH_OPTS, nas_host,
+            f"dd if={shlex.quote(remote_path)} bs=1M skip={pos} count={offset + length - pos} "
+            "iflag=skip_bytes,count_bytes status=none"]
+    p = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    while chunk := p.stdout.read(1024 * 1024):
+        os.pwrite(fd, chunk, pos)
+        pos += len(chunk)
+        done[i] = pos - offset
+    _, err = p.communicate()
+    if p.returncode != 0 or pos != offset + length:
+        raise RuntimeError(f"Command failed:\n{shlex.join(argv)}\n\nstderr:\n{err.decode(errors='replace')}")
+
+
+def download_parallel(nas_host: str, remote_path: str, local_dest: Path, size: int, mtime: int,
+                      n: int = 4):
+    """
+    Fetches one file as n byte-range stripes over separate ssh streams,
+    each written straight into its place in the local file.
+    size/mtime must be fresh from remote_stat(), not from a cached listing.
+    If interrupted, the .part file and per-stripe progress are kept and a rerun
+    only fetches what is missing, as long as the remote file is unchanged.
+    """
+    final = local_dest / posixpath.basename(remote_path)
+    part = final.with_name(final.name + ".part")
+    stripe = -(-size // n)
+    key = hashlib.sha1(f"{nas_host}\0{remote_path}\0{part}".encode()).hexdigest()
+    state_path = INFLIGHT_DIR / f"{key}.json"
+
+    done = [0] * n
+    try:
+        state = json.loads(state_path.read_text())
+        if part.exists() and (state["size"], state["mtime"], state["n"]) == (size, mtime, n):
+            done = state["done"]
+    except (OSError, ValueError, KeyError):
+        pass  # nothing (usable) to resume
+
+    def save_state():
+        try:
+            INFLIGHT_DIR.mkdir(parents=True, exist_ok=True)
+            state_path.write_text(json.dumps({"size": size, "mtime": mtime, "n": n, "done": done}))
+        except OSError:
+            pass  # only costs the ability to resume
+
+    with open(part, "r+b" if any(done) else "wb") as f:
+        f.truncate(size)
+        try:
+            with ThreadPoolExecutor(max_workers=n) as pool:
+                futures = [
+                    pool.submit(_fetch_stripe, nas_host, remote_path, f.fileno(),
+                                i * stripe, min(stripe, size - i * stripe), done, i)
+                    for i in range(n) if i * stripe < size
+                ]
+                pending = set(futures)
+                try:
+                    while pending and not any(fut.done() and fut.exception() for fut in futures):
+                        _, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+                        save_state()
+                        print(f"\r  {human_size(sum(done))} / {human_size(size)} ({sum(done) * 100 // size}%)",
+                              end="", flush=True)
+                finally:
+                    print()
+                    for fut in pending:
+                        fut.cancel()
+        finally:
+            save_state()  # also on Ctrl-C, once the stripes have stopped
+        errors = [fut.exception() for fut in futures if not fut.cancelled() and fut.exception()]
+    if errors:
+        raise errors[0]
+    os.replace(part, final)
+    state_path.unlink(missing_ok=True)
+
+
+def download(nas_host: str, use_rsync: bool, remote_path: str, local_dest: Path, is_dir: bool,
+             rsync_flags: list[str] = None, size: int = -1, parallel_streams: int = 1,
+             dir_transport: str = None, sshtar_zstd: bool = False):
+    transport = "rsync" if use_rsync else "sftp"
+    if is_dir and dir_transport:
+        transport = dir_transport
+
+    parallel = (not is_dir and parallel_streams > 1 and size >= PARALLEL_MIN_SIZE
+                and remote_dd_ranges_ok(nas_host))
+    if parallel:
+        # size came from a possibly stale listing; stripe on what is there now
+        size, mtime = remote_stat(nas_host, remote_path)
+        parallel = size >= PARALLEL_MIN_SIZE
+
+    if parallel:
+        download_parallel(nas_host, remote_path, local_dest, size, mtime, n=parallel_streams)
+    elif _session is not None:
+        _session.get(remote_path, local_dest, is_dir=is_dir)
+    elif transport == "sshtar":
+        download_sshtar(nas_host, remote_path, local_dest, zstd=sshtar_zstd)
+    elif transport == "rsync":
+        if rsync_flags is not None:
+            download_rsync(nas_host, remote_path, local_dest, rsync_flags)  # output is the user's call
+        else:
+            resume = not is_dir and can_append_resume(nas_host, remote_path, local_dest)
+            flags = list(tuned_rsync_flags(nas_host, resume=resume))
+            progress = rsync_versions(nas_host)[0] >= (3, 1)
+            download_rsync(nas_host, remote_path, local_dest, flags, progress=progress)
+    else:
+        download_sftp(nas_host, remote_path, local_dest, is_dir=is_dir)
 
 
 def main():
+    global _session
     cfg = load_config()
 
     NAS_HOST = cfg["nas_host"]
     REMOTE_ROOT = cfg["remote_root"]
     LOCAL_DEST = cfg["local_dest"]
     USE_RSYNC = cfg["use_rsync"]
+    CACHE_TTL = cfg["listing_cache_ttl"]
+    RSYNC_FLAGS = cfg["rsync_flags"]
+    PARALLEL_STREAMS = cfg["parallel_streams"]
+    DIR_TRANSPORT = cfg["dir_transport"]
+    SSHTAR_ZSTD = cfg["sshtar_zstd"]
 
+    LOCAL_DEST.mkdir(parents=True, exist_ok=True)
     remote_dir = REMOTE_ROOT
+    refresh = False
+    setup_control_master(NAS_HOST)  # still used by fzf's remote filtering and parallel stripes
+    if cfg["ssh_backend"] == "asyncssh":
+        _session = AsyncSSHSession(NAS_HOST)
+        atexit.register(_session.close)
+    load_listing_cache()
+    atexit.register(save_listing_cache)
+
+    picker = FzfSession() if fzf_listen_ok() else None
+    if picker:
+        atexit.register(picker.close)
 
     while True:
-        items = list_remote(NAS_HOST, remote_dir)
+        items = cached_list_remote(NAS_HOST, remote_dir, CACHE_TTL, refresh=refresh)
+        prefetch_subdirs(NAS_HOST, remote_dir, items, CACHE_TTL)
         lines = ["../\n"] + [x + "\n" for x in items]
-        key, choice = pick_with_fzf(lines)
+        remote_filter = len(items) > LISTING_LIMIT
+        if picker:
+            try:
+                picker.show(lines, remote_filter_cmd(NAS_HOST, remote_dir, query='"$1"') if remote_filter else None)
+            except (RuntimeError, OSError) as e:
+                print(f"fzf --listen unavailable ({e}); falling back to one fzf per directory")
+                picker.close()
+                picker = None
+        if picker:
+            key, choice = picker.next_event()
+        else:
+            key, choice = pick_with_fzf(lines, remote_filter_cmd(NAS_HOST, remote_dir) if remote_filter else None)
+
+        refresh = (key == "ctrl-r")
+        if refresh:
+            continue
 
         if not choice:
+            stop_prefetch()  # the interpreter would otherwise run the queue dry before exiting
+            if picker:
+                picker.close()
             print("No selection, exiting.")
             return 0
 
         if choice == "../":
             if remote_dir != "/":
-                remote_dir = str(Path(remote_dir).parent)
+                remote_dir = posixpath.dirname(remote_dir) or "/"
             continue
 
         is_dir = choice.endswith("/")
         download_dir_key = (key in ("d", "D"))
 
         if is_dir:
-            dir_path = str(Path(remote_dir) / choice[:-1])
+            dir_path = posixpath.join(remote_dir, choice[:-1])
 
             if download_dir_key:
+                stop_prefetch()
+                if picker:
+                    picker.close()
                 print(f"⬇ Downloading directory: {dir_path}")
-                download(NAS_HOST, USE_RSYNC, dir_path, LOCAL_DEST, is_dir=True)
+                download(NAS_HOST, USE_RSYNC, dir_path, LOCAL_DEST, is_dir=True, rsync_flags=RSYNC_FLAGS,
+                         dir_transport=DIR_TRANSPORT, sshtar_zstd=SSHTAR_ZSTD)
                 print("✅ Done.")
                 return 0
             else:
@@ -150,9 +972,14 @@ def main():
                 continue
 
         # file selected (Enter, or even D — we’ll just download the file)
-        file_path = str(Path(remote_dir) / choice)
-        print(f"⬇ Downloading file: {file_path}")
-        download(NAS_HOST, USE_RSYNC, file_path, LOCAL_DEST, is_dir=False)
+        stop_prefetch()
+        if picker:
+            picker.close()
+        file_path = posixpath.join(remote_dir, choice)
+        size = items.get(choice, -1)
+        print(f"⬇ Downloading file: {file_path}" + (f" ({human_size(size)})" if size >= 0 else ""))
+        download(NAS_HOST, USE_RSYNC, file_path, LOCAL_DEST, is_dir=False, rsync_flags=RSYNC_FLAGS,
+                 size=size, parallel_streams=PARALLEL_STREAMS)
         print("✅ Done.")
         return 0
 
@@ -0,0 +1,109 @@
+import os
+import subprocess
+
+import pytest
+
+import nas_pick_download as npd
+
+
+def run_locally(nas_host, cmd):
+    return subprocess.run(["sh", "-c", cmd], stdout=subprocess.PIPE, text=True, check=True).stdout
+
+
+# --- parse_listing ---
+
+def test_parse_listing_find_records():
+    records = ["f\t10\tb.iso", "d\t4096\tGames", "f\t0\tname\twith\ttabs", ""]
+    assert npd.parse_listing(records, from_find=True) == {
+        "Games/": 4096,
+        "b.iso": 10,
+        "name\twith\ttabs": 0,
+    }
+
+
+def test_parse_listing_skips_malformed_records():
+    records = ["f\t10\tok.bin", "garbage", "f\tbig\tbad_size.bin", "d\t"]
+    assert npd.parse_listing(records, from_find=True) == {"ok.bin": 10}
+
+
+def test_parse_listing_ls_records():
+    assert npd.parse_listing(["b.txt", "a/", ""], from_find=False) == {"a/": -1, "b.txt": -1}
+
+
+# --- list_remote_batch ---
+
+@pytest.mark.parametrize("from_find", [True, False])
+def test_list_remote_batch_runs_marker_protocol(tmp_path, monkeypatch, from_find):
+    monkeypatch.setattr(npd, "remote_run", run_locally)
+    monkeypatch.setattr(npd, "remote_find_printf_ok", lambda nas_host: from_find)
+    (tmp_path / "one").mkdir()
+    (tmp_path / "one" / "sub").mkdir()
+    (tmp_path / "one" / "file.bin").write_bytes(b"12345")
+    (tmp_path / "one" / ".hidden").write_bytes(b"")
+    (tmp_path / "empty dir").mkdir()
+    dirs = [str(tmp_path / "one"), str(tmp_path / "missing"), str(tmp_path / "empty dir")]
+
+    listings = npd.list_remote_batch("nas", dirs)
+
+    assert set(listings) == {dirs[0], dirs[2]}
+    if from_find:
+        assert listings[dirs[0]] == {"file.bin": 5, "sub/": os.stat(tmp_path / "one" / "sub").st_size}
+    else:
+        assert listings[dirs[0]] == {"file.bin": -1, "sub/": -1}
+    assert listings[dirs[2]] == {}
+
+
+def test_list_remote_batch_parses_canned_output(monkeypatch):
+    out = (
+        "\tdir\t/a\0f\t1\tx\0\tok\0"
+        "\tdir\t/b\0f\t2\ty\0\terr\0"          # failed part way: dropped
+        "stray\0"                              # outside any dir: ignored
+        "\tdir\t/c\0broken\0d\t0\tz\0\tok\0"
+    )
+    monkeypatch.setattr(npd, "remote_run", lambda nas_host, cmd: out)
+    monkeypatch.setattr(npd, "remote_find_printf_ok", lambda nas_host: True)
+    assert npd.list_remote_batch("nas", ["/a", "/b", "/c"]) == {"/a": {"x": 1}, "/c": {"z/": 0}}
+
+
+def test_list_remote_batch_empty():
+    assert npd.list_remote_batch("nas", []) == {}
+
+
+# --- parse_rsync_version ---
+
+@pytest.mark.parametrize("out, expected", [
+    ("rsync  version 3.2.7  protocol version 31\nCopyright (C) 1996-2022", (3, 2)),
+    ("rsync  version v3.1.3  protocol version 31\n", (3, 1)),
+    ("openrsync: protocol version 29\nrsync version 2.6.9 compatible\n", (0,)),
+    ("protocol version 31\n", (0,)),
+    ("", (0,)),
+])
+def test_parse_rsync_version(out, expected):
+    assert npd.parse_rsync_version(out) == expected
+
+
+# --- remote_filter_cmd ---
+
+def test_remote_filter_cmd_quoting(tmp_path, monkeypatch):
+    # stand-in ssh that runs the remote command locally, the way sshd would
+    fake_bin = tmp_path / "bin"
+    fake_bin.mkdir()
+    (fake_bin / "ssh").write_text('#!/bin/sh\nfor a; do last=$a; done\nexec sh -c "$last"\n')
+    (fake_bin / "ssh").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{fake_bin}{os.pathsep}{os.environ['PATH']}")
+
+    remote_dir = tmp_path / "it's a $dir"
+    remote_dir.mkdir()
+    for name in ("Foo $(touch pwned) 'x'.iso", "bar.iso"):
+        (remote_dir / name).write_bytes(b"")
+
+    cmd = npd.remote_filter_cmd("nas", str(remote_dir), query='"$1"')
+    out = subprocess.run(["sh", "-c", cmd, "sh", "$(touch pwned) 'x"], cwd=tmp_path,
+                         stdout=subprocess.PIPE, text=True, check=True).stdout
+
+    assert out.splitlines() == ["../", "Foo $(touch pwned) 'x'.iso"]
+    assert not (tmp_path / "pwned").exists() and not (remote_dir / "pwned").exists()
+
+
+def test_remote_filter_cmd_defaults_to_fzf_query():
+    assert npd.remote_filter_cmd("nas", "/r").startswith("printf '../\\n'; printf '%s\\n' {q} | ssh ")